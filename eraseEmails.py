@@ -1,16 +1,12 @@
 #!/usr/bin/env python3
 import argparse
 import datetime
+import functools
 import logging
 import os
 import sys
 import time
 from typing import List, Optional
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from src.api.gmail_client import GmailClient
-from src.api.auth import Auth
 from src.config import SCOPES, CLIENT_CONFIG
 
 # Configure logging
@@ -20,12 +16,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+CREDENTIALS_PATH = 'user_credentials.json'
+
+@functools.lru_cache(maxsize=1)
+def _load_creds(path, mtime):
+    """Load credentials from disk; cached until the file's mtime changes."""
+    from google.oauth2.credentials import Credentials
+    return Credentials.from_authorized_user_file(path, SCOPES)
+
 def setup_credentials():
     """Set up and return Gmail credentials."""
+    # Deferred so --help doesn't pay for the Google auth stack
+    from google.auth.transport.requests import Request
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from src.api.auth import Auth
+
     creds = None
     try:
         # Try to load existing credentials
-        creds = Credentials.from_authorized_user_file('user_credentials.json', SCOPES)
+        creds = _load_creds(CREDENTIALS_PATH, os.stat(CREDENTIALS_PATH).st_mtime)
     except Exception:
         logger.info("No valid credentials found.")
     
@@ -49,7 +58,7 @@ def setup_credentials():
                 )
                 auth = Auth(flow)
                 oauth_creds = auth.get_client_credentials()
-                auth.write_credentials_to_json(oauth_creds)
+                auth.write_credentials_to_json(oauth_creds, CREDENTIALS_PATH)
                 creds = oauth_creds.to_google_credentials()
                 logger.info("New credentials obtained and saved")
             except Exception as e:
@@ -61,7 +70,8 @@ def setup_credentials():
 def validate_date(date_str):
     """Validate date string format."""
     try:
-        return datetime.datetime.strptime(date_str, '%Y-%m-%d').strftime('%Y-%m-%d')
+        # isoformat() normalizes the other ISO forms 3.11 accepts (e.g. 20240101) to YYYY-MM-DD
+        return datetime.date.fromisoformat(date_str).isoformat()
     except ValueError:
         raise argparse.ArgumentTypeError(f"Invalid date format: {date_str}. Use YYYY-MM-DD")
 
@@ -99,15 +109,36 @@ def main():
         help='Show what would be deleted without actually deleting'
     )
 
+    parser.add_argument(
+        '--assume-yes',
+        action='store_true',
+        help='Skip the confirmation prompt and delete emails as they are fetched'
+    )
+
     args = parser.parse_args()
 
+    from src.api.gmail_client import GmailClient
+
     try:
         # Set up credentials and client
         credentials = setup_credentials()
         gmail_client = GmailClient(credentials)
         
-        # Fetch emails
         logger.info(f"Fetching {args.category} emails from {args.start_date} to {args.end_date}")
+
+        if args.assume_yes and not args.dry_run:
+            # Stream pages straight into deletion; memory stays bounded by the batch size
+            emails = gmail_client.iter_user_emails(
+                start_date=args.start_date,
+                end_date=args.end_date,
+                category=args.category,
+                ids_only=True
+            )
+            deleted_count = gmail_client.delete_user_emails({args.category: emails}, args.category)
+            logger.info(f"Successfully deleted {deleted_count} emails")
+            return
+
+        # Fetch emails
         emails = gmail_client.fetch_user_emails(
             start_date=args.start_date,
             end_date=args.end_date,
@@ -1,7 +1,6 @@
-import json
+import orjson
 from src.models.ouath_credentials import OAuthCredentials
 from pathlib import Path
-from fastapi import HTTPException
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -33,8 +32,7 @@ class Auth:
     def write_credentials_to_json(credentials, file_path='user_credentials.json'):
         try:
             file_path = Path(file_path)
-            with open(file_path, 'w') as json_file:
-                json.dump(credentials.to_dict(), json_file, indent=4)
+            file_path.write_bytes(orjson.dumps(credentials.to_dict(), option=orjson.OPT_INDENT_2))
             logger.info("Credentials successfully written to %s", file_path)
         except IOError as e:
             logger.error("Error writing to file %s: %s", file_path, e)
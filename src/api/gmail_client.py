@@ -1,15 +1,31 @@
-from googleapiclient.discovery import build
+import functools
+import json
+from contextlib import closing, contextmanager, suppress
 import logging
 from src.models.ouath_credentials import OAuthCredentials
 import time
-from typing import List, Dict
-from googleapiclient.http import BatchHttpRequest
+import queue
+import threading
+from collections import deque
+from collections.abc import Sized
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from itertools import islice
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.errors import HttpError
-import random
+from tenacity import retry, retry_if_exception, retry_if_result, stop_after_attempt, wait_exponential_jitter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=None)
+def _gmail_discovery_document() -> dict:
+    """Gmail v1 discovery document bundled with googleapiclient, read and parsed once per process"""
+    from googleapiclient import discovery_cache
+    return json.loads(discovery_cache.get_static_doc('gmail', 'v1'))
+
+
 class GmailError(Exception):
     """Custom exception for Gmail-related errors"""
     pass
@@ -18,6 +34,45 @@ class RateLimitError(GmailError):
     """Raised when rate limit is hit"""
     pass
 
+
+RETRYABLE_STATUSES = (429, 500, 503)
+
+
+def _is_retryable(exception: BaseException) -> bool:
+    return isinstance(exception, HttpError) and exception.resp.status in RETRYABLE_STATUSES
+
+
+# Responses a single bad id can cause. 401/403 (auth, missing scope, userRateLimitExceeded)
+# fail every id alike, so splitting the batch would only multiply the failing calls.
+REJECTED_STATUSES = (400, 404)
+
+
+def _is_rejected(exception: BaseException) -> bool:
+    """The request itself (e.g. one bad id) is at fault, not the server or the credentials"""
+    return isinstance(exception, HttpError) and exception.resp.status in REJECTED_STATUSES
+
+
+def _log_backoff(retry_state):
+    """tenacity before_sleep hook: count rate limit hits and log the backoff"""
+    client = retry_state.args[0]
+    status = retry_state.outcome.exception().resp.status
+    if status == 429:
+        with client._stats_lock:
+            client.rate_limit_hits += 1
+    logger.warning(f"HTTP {status} (rate limits hit: {client.rate_limit_hits}). Backing off for "
+                   f"{retry_state.next_action.sleep:.1f} seconds "
+                   f"(retry {retry_state.attempt_number}/{client.MAX_RETRIES})")
+
+
+def _retries_exhausted(retry_state):
+    """tenacity retry_error_callback: surface exhausted rate limiting as RateLimitError"""
+    exception = retry_state.outcome.exception()
+    if exception.resp.status == 429:
+        client = retry_state.args[0]
+        raise RateLimitError(f"Maximum retry attempts reached. "
+                             f"Total rate limits hit: {client.rate_limit_hits}") from exception
+    raise exception
+
 class GmailClient:
     # Gmail API quotas (https://developers.google.com/gmail/api/reference/quota)
     QUOTA_USER_QUERIES_PER_SEC = 25
@@ -25,112 +80,438 @@ class GmailClient:
     MAX_RETRIES = 5
     MIN_BACKOFF_TIME = 2  # Increased initial backoff time
     MAX_BACKOFF_TIME = 120  # Increased maximum backoff time
-    BATCH_DELAY = 2  # Increased delay between batches
+    MAX_WORKERS = 8  # Concurrent deletion batches
+    BULK_DELETE_LIMIT = 1000  # Max IDs accepted by a single messages.batchDelete call
+    # Partial response masks for messages.list (drops resultSizeEstimate and unused fields)
+    LIST_FIELDS = 'messages(id,threadId),nextPageToken'
+    LIST_ID_FIELDS = 'messages/id,nextPageToken'
     
     def __init__(self, client_credentials, batch_size: int = 20):  # Reduced default batch size
+        from googleapiclient.discovery import build_from_document
+
         if isinstance(client_credentials, OAuthCredentials):
             client_credentials = client_credentials.to_google_credentials()
-        self.gmail_client = build('gmail', 'v1', credentials=client_credentials)
+        self.credentials = client_credentials
+        # Keep-alive connection; seeds the pool below so the first request reuses it
+        self.http = AuthorizedHttp(client_credentials, http=httplib2.Http())
+        self.gmail_client = build_from_document(_gmail_discovery_document(), http=self.http)
         self.batch_size = min(batch_size, 25)  # More conservative batch size limit
-        self.current_batch_success = 0
-        self.current_batch_errors = 0
         self.total_requests = 0
         self.rate_limit_hits = 0
-        self.last_request_time = 0
+        # Send times of the most recent requests, one slot per query allowed each second
+        self._bucket = deque(maxlen=self.QUOTA_USER_QUERIES_PER_SEC)
+        # Idle AuthorizedHttp objects outlive the short-lived pager/worker threads, so TLS
+        # connections stay warm across fetch and delete calls. LIFO hands out the warmest one.
+        self._http_pool = queue.LifoQueue()
+        self._http_pool.put(self.http)
+        self._quota_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        # Cap concurrent in-flight requests below the per-user QPS ceiling
+        self._in_flight = threading.Semaphore(self.QUOTA_USER_QUERIES_PER_SEC)
 
-    def _wait_for_quota(self):
-        """Ensure we don't exceed quota by waiting if needed"""
-        now = time.time()
-        if self.last_request_time > 0:
-            elapsed = now - self.last_request_time
-            if elapsed < 0.1:  # Ensure minimum 100ms between requests
-                time.sleep(0.1 - elapsed)
-        self.last_request_time = time.time()
+    @contextmanager
+    def _checkout_http(self) -> Iterator[AuthorizedHttp]:
+        """
+        Borrow an idle authorized Http from the pool, creating one if all are in use.
+        httplib2 is not thread-safe, so each Http serves one request at a time.
+        """
+        try:
+            http = self._http_pool.get_nowait()
+        except queue.Empty:
+            http = AuthorizedHttp(self.credentials, http=httplib2.Http())
+        try:
+            yield http
+        finally:
+            self._http_pool.put(http)
 
-    def _handle_rate_limit(self, retry_count: int) -> float:
+    def _wait_for_quota(self, cost: int = 1):
         """
-        Implements exponential backoff with jitter for rate limit handling.
-        Returns the time to sleep in seconds.
+        Ensure we don't exceed quota, sleeping only once a full second's quota has been used.
+        cost is the number of queries the request counts as; Gmail charges each call inside
+        a batch separately.
         """
-        self.rate_limit_hits += 1
-        if retry_count >= self.MAX_RETRIES:
-            raise RateLimitError(f"Maximum retry attempts reached. Total rate limits hit: {self.rate_limit_hits}")
-        
-        # Calculate exponential backoff with jitter
-        backoff = min(self.MAX_BACKOFF_TIME, self.MIN_BACKOFF_TIME * (2 ** retry_count))
-        jitter = random.uniform(0, 0.1 * backoff)  # Add 0-10% jitter
-        total_delay = backoff + jitter
-        
-        logger.warning(f"Rate limit hit #{self.rate_limit_hits}. Backing off for {total_delay:.1f} seconds "
-                      f"(retry {retry_count + 1}/{self.MAX_RETRIES})")
-        return total_delay
+        cost = min(cost, self.QUOTA_USER_QUERIES_PER_SEC)
+        with self._quota_lock:
+            now = time.monotonic()
+            while self._bucket and now - self._bucket[0] > 1.0:
+                self._bucket.popleft()
+            overflow = len(self._bucket) + cost - self.QUOTA_USER_QUERIES_PER_SEC
+            if overflow > 0:
+                # Wait for the send time that frees enough slots to leave the window
+                time.sleep(max(0.0, 1.0 - (now - self._bucket[overflow - 1])))
+            now = time.monotonic()
+            self._bucket.extend([now] * cost)
 
-    def fetch_user_emails(self, start_date="2024-09-01", end_date="2024-10-16", category="promotions"):
-        query = f"category:{category} after:{start_date} before:{end_date}"
-        emails = []
+    PAGE_PUT_TIMEOUT = 0.5  # Seconds between stop checks while the page queue is full
+
+    def _put_page(self, pages: queue.Queue, item, stop: threading.Event) -> bool:
+        """Hand item to the consumer; gives up (returning False) once stop is set"""
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=self.PAGE_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce_pages(self, query: str, fields: str, pages: queue.Queue, stop: threading.Event):
+        """
+        Pager: request each page as soon as the previous nextPageToken arrives and hand
+        its messages to the consumer. A None sentinel marks the end of the stream; setting
+        stop ends it early, even while blocked on a full queue.
+        """
         page_token = None
-        retry_count = 0
 
         try:
             while True:
+                results = self._execute_with_retry(self.gmail_client.users().messages().list(
+                    userId='me',
+                    q=query,
+                    pageToken=page_token,
+                    maxResults=100,  # Limit results per page
+                    fields=fields
+                ))
+
+                self._count_requests()
+                messages = results.get('messages', [])
+                if not messages:
+                    break
+
+                if not self._put_page(pages, messages, stop):
+                    break
+                page_token = results.get('nextPageToken')
+
+                if not page_token or stop.is_set():
+                    break
+        finally:
+            self._put_page(pages, None, stop)
+
+    def _iter_query(self, query: str, fields: str = LIST_FIELDS) -> Iterator[dict]:
+        """
+        Stream messages matching query page by page. At most a couple of pages are held
+        in memory at once, however many messages match.
+        """
+        count = 0
+        # Bounded so the pager stays at most a couple of pages ahead of the consumer
+        pages = queue.Queue(maxsize=2)
+        stop = threading.Event()
+
+        try:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                pager = executor.submit(self._produce_pages, query, fields, pages, stop)
                 try:
-                    results = self.gmail_client.users().messages().list(
-                        userId='me',
-                        q=query,
-                        pageToken=page_token,
-                        maxResults=100  # Limit results per page
-                    ).execute()
-                    
-                    self.total_requests += 1
-                    messages = results.get('messages', [])
-                    if not messages:
-                        break
-
-                    emails.extend(messages)
-                    page_token = results.get('nextPageToken')
-                    
-                    if not page_token:
-                        break
-
-                    # Add delay between pages to respect rate limits
-                    time.sleep(2)  # Increased delay between pages
-
-                except HttpError as e:
-                    if e.resp.status == 429:  # Rate limit exceeded
-                        retry_count += 1
-                        sleep_time = self._handle_rate_limit(retry_count)
-                        time.sleep(sleep_time)
-                        continue
-                    raise
+                    while (messages := pages.get()) is not None:
+                        count += len(messages)
+                        yield from messages
+                finally:
+                    # If the consumer stopped early, unblock the pager and let it wind down
+                    stop.set()
+                    while not pager.done():
+                        try:
+                            pages.get(timeout=self.PAGE_PUT_TIMEOUT)
+                        except queue.Empty:
+                            pass
+                pager.result()  # Re-raise any error from the pager
 
-            n = len(emails)
-            logger.info(f"Successfully retrieved {n} emails from gmail")
-            return emails
+            logger.info(f"Successfully retrieved {count} emails from gmail")
 
         except Exception as e:
             logger.error(f"Error retrieving emails: {str(e)}")
             raise GmailError(f"Failed to fetch emails: {str(e)}")
 
-    def _callback_success(self, request_id, response, exception):
-        """Callback for batch request success"""
-        if exception is not None:
-            if isinstance(exception, HttpError) and exception.resp.status == 429:
-                # Don't count rate limit errors as permanent failures
-                logger.warning(f"Rate limit hit in batch for message {request_id}")
-                self.current_batch_errors += 1
+    def iter_user_emails(self, start_date="2024-09-01", end_date="2024-10-16",
+                         category="promotions", ids_only: bool = False) -> Iterator[dict]:
+        """Stream matching messages; ids_only drops threadId for callers that only delete"""
+        fields = self.LIST_ID_FIELDS if ids_only else self.LIST_FIELDS
+        query = f"category:{category} after:{start_date} before:{end_date}"
+        return self._iter_query(query, fields)
+
+    def fetch_user_emails(self, start_date="2024-09-01", end_date="2024-10-16", category="promotions"):
+        return list(self.iter_user_emails(start_date=start_date, end_date=end_date, category=category))
+
+    @retry(
+        retry=retry_if_exception(_is_retryable),
+        wait=wait_exponential_jitter(initial=MIN_BACKOFF_TIME, max=MAX_BACKOFF_TIME),
+        stop=stop_after_attempt(MAX_RETRIES),
+        before_sleep=_log_backoff,
+        retry_error_callback=_retries_exhausted,
+    )
+    def _execute_with_retry(self, request, cost: int = 1):
+        """
+        Execute a request on a pooled Http, capping concurrent in-flight calls.
+        cost is the request's weight against the per-second quota (the size of a batch).
+        429/500/503 responses are retried with jittered exponential backoff.
+        """
+        with self._in_flight:
+            self._wait_for_quota(cost)
+            with self._checkout_http() as http:
+                return request.execute(http=http)
+
+    def _count_requests(self, count: int = 1):
+        with self._stats_lock:
+            self.total_requests += count
+
+    @retry(
+        retry=retry_if_result(bool),
+        wait=wait_exponential_jitter(initial=MIN_BACKOFF_TIME, max=MAX_BACKOFF_TIME),
+        stop=stop_after_attempt(MAX_RETRIES),
+        retry_error_callback=lambda retry_state: retry_state.outcome.result(),
+    )
+    def _trash_batch_once(self, results: dict) -> List[dict]:
+        """
+        Move results['pending'] to Trash in one BatchHttpRequest, tallying outcomes into results.
+        Rate-limited messages are left pending and returned; tenacity re-batches just those
+        after a backoff.
+        """
+        messages = results['pending']
+        rate_limited = []
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                if isinstance(exception, HttpError) and exception.resp.status == 429:
+                    # Don't count rate limit errors as permanent failures
+                    rate_limited.append(request_id)
+                else:
+                    logger.error(f"Error in batch request {request_id}: {str(exception)}")
+                    results['errors'].append(request_id)
+            else:
+                results['deleted'].append(request_id)
+
+        # Create new batch request
+        batch_request = self.gmail_client.new_batch_http_request(callback=callback)
+
+        # Add each message to the batch, resolving the method chain once
+        trash = self.gmail_client.users().messages().trash
+        add = batch_request.add
+        for message in messages:
+            message_id = message['id']
+            add(trash(userId='me', id=message_id), request_id=message_id)
+
+        # Execute batch request
+        self._execute_with_retry(batch_request, cost=len(messages))
+        self._count_requests(len(messages))
+        results['rate_limited'] = rate_limited
+
+        if rate_limited:
+            with self._stats_lock:
+                self.rate_limit_hits += 1
+            logger.warning(f"Rate limit hit in batch for {len(rate_limited)} messages, re-batching them")
+        rate_limited_ids = set(rate_limited)
+        results['pending'] = [m for m in messages if m['id'] in rate_limited_ids]
+        return results['pending']
+
+    def _delete_batch(self, messages: List[dict], soft_delete: bool = True) -> Tuple[List[str], List[str]]:
+        """
+        Delete a batch of messages, isolating failures by halving.
+
+        A batch rejected as a whole with a 400/404 is split in two and each half retried, down
+        to a single trash/delete call per message, so one bad id costs O(log n) extra calls.
+        Auth errors (401/403), server errors that outlast the retries and transport errors
+        are re-raised instead: halving can't help when every id fails the same way.
+
+        Args:
+            messages: List of message dicts containing at least an 'id'
+            soft_delete: Move to Trash with a BatchHttpRequest instead of batchDelete
+
+        Returns:
+            Tuple[List[str], List[str]]: (deleted ids, failed ids)
+        """
+        if not messages:
+            return [], []
+
+        if len(messages) == 1:
+            message_id = messages[0]['id']
+            messages_api = self.gmail_client.users().messages()
+            request = messages_api.trash if soft_delete else messages_api.delete
+            try:
+                self._execute_with_retry(request(userId='me', id=message_id))
+                self._count_requests()
+                return [message_id], []
+            except HttpError as e:
+                if not _is_rejected(e):
+                    raise
+                logger.error(f"Failed to delete message {message_id}: {str(e)}")
+                return [], [message_id]
+
+        # Per-batch results captured by the callback, so parallel batches don't share state
+        results = {'deleted': [], 'errors': [], 'rate_limited': [], 'pending': messages}
+        try:
+            if soft_delete:
+                self._trash_batch_once(results)
             else:
-                logger.error(f"Error in batch request {request_id}: {str(exception)}")
-                self.current_batch_errors += 1
+                ids = [m['id'] for m in messages]
+                self._execute_with_retry(self.gmail_client.users().messages().batchDelete(
+                    userId='me',
+                    body={'ids': ids}
+                ))
+                self._count_requests()
+                results['deleted'] = ids
+            return results['deleted'], results['errors'] + results['rate_limited']
+
+        except HttpError as e:
+            if not _is_rejected(e):
+                raise
+            settled = set(results['deleted']) | set(results['errors'])
+            remaining = [m for m in results['pending'] if m['id'] not in settled]
+            logger.warning(f"Batch of {len(remaining)} messages failed ({str(e)}), retrying in halves")
+            mid = len(remaining) // 2
+            left_deleted, left_failed = self._delete_batch(remaining[:mid], soft_delete)
+            right_deleted, right_failed = self._delete_batch(remaining[mid:], soft_delete)
+            return (results['deleted'] + left_deleted + right_deleted,
+                    results['errors'] + left_failed + right_failed)
+
+    def _bulk_delete_chunk(self, chunk: List[dict], batch_number: int) -> List[str]:
+        """Worker: permanently delete one chunk with batchDelete. Returns the deleted ids."""
+        deleted, failed = self._delete_batch(chunk, soft_delete=False)
+        logger.info(f"Batch {batch_number}: Permanently deleted {len(deleted)} messages ({len(failed)} errors)")
+        return deleted
+
+    def _trash_batch(self, batch: List[dict], batch_number: int) -> List[str]:
+        """Worker: move one batch of messages to Trash. Returns the trashed ids."""
+        deleted, failed = self._delete_batch(batch)
+        logger.info(f"Batch {batch_number}: Successfully moved {len(deleted)} messages to trash "
+                    f"({len(failed)} errors). Total rate limits hit: {self.rate_limit_hits}")
+        return deleted
+
+    @staticmethod
+    def _chunked(messages: Iterable[dict], size: int) -> Iterator[List[dict]]:
+        """
+        Slice a list or a stream of messages into batches without materializing it.
+        Closing the batches closes a streamed source too, which stops its pager.
+        """
+        it = iter(messages)
+        try:
+            while batch := list(islice(it, size)):
+                yield batch
+        finally:
+            if hasattr(it, 'close'):
+                it.close()
+
+    def _log_progress(self, deleted_count: int, msg_count: Optional[int]):
+        if msg_count:
+            progress = (deleted_count / msg_count) * 100
+            done = f"{progress:.1f}% ({deleted_count}/{msg_count} messages deleted)"
         else:
-            self.current_batch_success += 1
+            done = f"{deleted_count} messages deleted"
+        logger.info(f"Progress: {done}. "
+                    f"Total requests: {self.total_requests}, Rate limits hit: {self.rate_limit_hits}")
 
-    def delete_user_emails(self, cache: Dict[str, List[dict]], category: str) -> int:
+    def _run_batches(self, worker, batches: Iterable[List[dict]], msg_count: Optional[int],
+                     deleted_ids: Optional[List[str]] = None) -> int:
         """
-        Delete emails in batches with rate limit handling.
+        Run deletion batches on a thread pool and aggregate worker results on this thread.
+        Only a bounded number of batches are queued at once, so a stream stays O(batch size).
+        The batches are closed on the way out, so a failure doesn't strand a streaming source.
+        Deleted ids are only kept when the caller passes a deleted_ids list to fill; it holds
+        every batch that succeeded even if another batch's error is re-raised.
+
+        Returns:
+            int: Number of successfully deleted messages
+        """
+        deleted_count = 0
+
+        def collect(futures):
+            """Tally every successful batch, then re-raise the first failure, if any"""
+            nonlocal deleted_count
+            error = None
+            for future in futures:
+                # Collected futures leave pending, so the error path never counts them twice
+                pending.discard(future)
+                try:
+                    deleted = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                deleted_count += len(deleted)
+                if deleted_ids is not None:
+                    deleted_ids.extend(deleted)
+                self._log_progress(deleted_count, msg_count)
+            if error is not None:
+                raise error
+
+        pending = set()
+        with closing(batches), ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            try:
+                for n, batch in enumerate(batches, start=1):
+                    if len(pending) >= 2 * self.MAX_WORKERS:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    pending.add(executor.submit(worker, batch, n))
+
+                collect(as_completed(pending))  # as_completed iterates over its own copy
+            except Exception:
+                # Don't start queued batches, but count the ones already running
+                for future in pending:
+                    future.cancel()
+                with suppress(Exception):
+                    collect(f for f in wait(pending).done if not f.cancelled())
+                raise
+        return deleted_count
+
+    def _delete_messages(self, messages: Iterable[dict], soft_delete: bool,
+                         deleted_ids: Optional[List[str]] = None) -> int:
+        msg_count = len(messages) if isinstance(messages, Sized) else None
+        if soft_delete:
+            worker, size = self._trash_batch, self.batch_size
+            logger.info(f"Starting batch deletion of {msg_count or 'streamed'} messages "
+                        f"with batch size {size}")
+        else:
+            worker, size = self._bulk_delete_chunk, self.BULK_DELETE_LIMIT
+            logger.info(f"Starting bulk deletion of {msg_count or 'streamed'} messages "
+                        f"in chunks of {size}")
+
+        deleted_count = self._run_batches(worker, self._chunked(messages, size), msg_count, deleted_ids)
+
+        out_of = f" out of {msg_count}" if msg_count is not None else ""
+        logger.info(f"Deletion complete. Successfully deleted {deleted_count}{out_of} messages. "
+                    f"Total rate limits hit: {self.rate_limit_hits}")
+        return deleted_count
+
+    def batch_delete(self, messages: Iterable[dict], soft_delete: bool = True,
+                     deleted_ids: Optional[List[str]] = None) -> List[str]:
+        """
+        Delete messages from any mix of categories in shared batches, so several
+        categories cost ceil(total / batch size) batches rather than one run each.
+
+        Args:
+            messages: List or stream of message dicts containing at least an 'id'
+            soft_delete: Move messages to Trash. When False, messages are permanently
+                removed with batchDelete (requires the https://mail.google.com/ scope).
+            deleted_ids: Caller-owned list to fill with deleted ids. If a batch fails and
+                its error propagates, the list still holds everything deleted before that.
+
+        Returns:
+            List[str]: Ids of the messages that were deleted
+        """
+        if deleted_ids is None:
+            deleted_ids = []
+        self._delete_messages(messages, soft_delete, deleted_ids)
+        return deleted_ids
+
+    def delete_user_emails_bulk(self, messages: Iterable[dict]) -> int:
+        """
+        Permanently delete emails with the batchDelete endpoint.
+
+        Each chunk of up to BULK_DELETE_LIMIT ids is removed in a single HTTP call.
+        Requires the https://mail.google.com/ scope.
+
+        Args:
+            messages: List or stream of message dicts containing at least an 'id'
+
+        Returns:
+            int: Number of successfully deleted messages
+        """
+        return self._delete_messages(messages, soft_delete=False)
+
+    def delete_user_emails(self, cache: Dict[str, Iterable[dict]], category: str, soft_delete: bool = True) -> int:
+        """
+        Delete emails in parallel batches with rate limit handling.
         
         Args:
-            cache: Dictionary containing email messages by category
+            cache: Dictionary containing email messages (a list or a stream) by category
             category: The category of emails to delete
+            soft_delete: Move messages to Trash one request per message. When False,
+                messages are permanently removed via delete_user_emails_bulk.
             
         Returns:
             int: Number of successfully deleted messages
@@ -139,98 +520,5 @@ class GmailClient:
         if not messages:
             logger.warning(f"No messages found in cache for category: {category}")
             return 0
-            
-        msg_count = len(messages)
-        deleted_count = 0
-        batch_count = 0
-        retry_count = 0
-        logger.info(f"Starting batch deletion of {msg_count} messages with batch size {self.batch_size}")
-        
-        # Process in batches
-        for i in range(0, len(messages), self.batch_size):
-            batch = messages[i:i + self.batch_size]
-            batch_count += 1
-            
-            while True:  # Retry loop for rate limits
-                try:
-                    # Reset batch counters
-                    self.current_batch_success = 0
-                    self.current_batch_errors = 0
-                    
-                    # Create new batch request
-                    batch_request = self.gmail_client.new_batch_http_request(callback=self._callback_success)
-                    
-                    # Add each message to the batch
-                    for message in batch:
-                        self._wait_for_quota()
-                        batch_request.add(
-                            self.gmail_client.users().messages().trash(
-                                userId='me',
-                                id=message['id']
-                            ),
-                            request_id=message['id']
-                        )
-                    
-                    # Execute batch request
-                    self._wait_for_quota()
-                    batch_request.execute()
-                    self.total_requests += len(batch)
-                    
-                    # Update counts
-                    deleted_count += self.current_batch_success
-                    logger.info(f"Batch {batch_count}: Successfully moved {self.current_batch_success} messages to trash "
-                              f"({self.current_batch_errors} errors). Total rate limits hit: {self.rate_limit_hits}")
-                    
-                    # Reset retry count on success
-                    retry_count = 0
-                    
-                    # Add a delay between batches
-                    if i + self.batch_size < len(messages):
-                        time.sleep(self.BATCH_DELAY)
-                    
-                    break  # Break the retry loop on success
-                    
-                except HttpError as e:
-                    if e.resp.status == 429:  # Rate limit exceeded
-                        retry_count += 1
-                        sleep_time = self._handle_rate_limit(retry_count)
-                        time.sleep(sleep_time)
-                        continue
-                    raise
-                except Exception as e:
-                    logger.error(f"Error processing batch {batch_count}: {str(e)}")
-                    # If batch fails, try individual deletions as fallback
-                    for message in batch:
-                        for individual_retry in range(self.MAX_RETRIES):
-                            try:
-                                self._wait_for_quota()
-                                self.gmail_client.users().messages().trash(
-                                    userId='me',
-                                    id=message['id']
-                                ).execute()
-                                self.total_requests += 1
-                                deleted_count += 1
-                                logger.info(f"Fallback: Successfully deleted message {message['id']}")
-                                break
-                            except HttpError as inner_e:
-                                if inner_e.resp.status == 429:
-                                    sleep_time = self._handle_rate_limit(individual_retry)
-                                    logger.warning(f"Rate limit hit during fallback, backing off for {sleep_time:.1f} seconds")
-                                    time.sleep(sleep_time)
-                                    continue
-                                logger.error(f"Failed to delete message {message['id']}: {str(inner_e)}")
-                                break
-                            except Exception as inner_e:
-                                logger.error(f"Failed to delete message {message['id']}: {str(inner_e)}")
-                                break
-                        time.sleep(2)  # Increased delay between individual retries
-                    break  # Break the retry loop after fallback attempts
-            
-            # Log progress
-            progress = (deleted_count / msg_count) * 100
-            logger.info(f"Progress: {progress:.1f}% ({deleted_count}/{msg_count} messages deleted). "
-                       f"Total requests: {self.total_requests}, Rate limits hit: {self.rate_limit_hits}")
 
-        logger.info(f"Deletion complete. Successfully deleted {deleted_count} out of {msg_count} messages. "
-                   f"Total rate limits hit: {self.rate_limit_hits}")
-        return deleted_count
+        return self._delete_messages(messages, soft_delete)
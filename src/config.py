@@ -22,6 +22,7 @@ SCOPES = [
 
 CREDENTIALS_FILE = os.getenv("CREDENTIALS_FILE", "user_credentials.json")
 SCHEDULER_STATE_FILE = os.getenv("SCHEDULER_STATE_FILE", "scheduler_state.json")
+SCHEDULER_RUNS_FILE = os.getenv("SCHEDULER_RUNS_FILE", "scheduler_runs.ndjson")
 CLEANUP_CATEGORIES = os.getenv("CLEANUP_CATEGORIES", "promotions,social").split(",")
 CLEANUP_LOOKBACK_DAYS = int(os.getenv("CLEANUP_LOOKBACK_DAYS", "30"))
 CLEANUP_CRON_HOUR = int(os.getenv("CLEANUP_CRON_HOUR", "2"))
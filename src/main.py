@@ -1,15 +1,17 @@
-import json
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+from pathlib import Path
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from google.auth.transport.requests import Request as GoogleRequest
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
+import orjson
 
 from src.api.gmail_client import GmailClient
 from src.config import (
@@ -28,8 +30,7 @@ OAUTH_REDIRECT_URI = CLIENT_CONFIG["installed"]["redirect_uris"][0]
 
 def load_credentials_from_file(path: str) -> Credentials | None:
     try:
-        with open(path, "r") as f:
-            data = json.load(f)
+        data = orjson.loads(Path(path).read_bytes())
         creds = Credentials(
             token=data.get("token"),
             refresh_token=data.get("refresh_token"),
@@ -62,8 +63,7 @@ def save_credentials_to_file(creds: Credentials, path: str):
         "client_secret": creds.client_secret,
         "scopes": list(creds.scopes) if creds.scopes else SCOPES,
     }
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+    Path(path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
     logger.info(f"Credentials saved to {path}")
 
 
@@ -80,14 +80,16 @@ async def lifespan(app: FastAPI):
         app.state.gmail_client = None
         logger.warning("No valid credentials found. Use /auth/initiate to authenticate.")
 
-    def scheduled_cleanup():
+    async def scheduled_cleanup():
         if app.state.gmail_client is None:
             logger.warning("Scheduler: no Gmail client, skipping cleanup.")
             return
         job = CleanupJob()
-        job.run(app.state.gmail_client, app.state.scheduler_manager)
+        # Gmail calls are blocking; keep them off the event loop
+        await asyncio.to_thread(job.run, app.state.gmail_client, app.state.scheduler_manager)
 
-    scheduler = BackgroundScheduler(daemon=True)
+    # Runs on the FastAPI event loop instead of its own thread
+    scheduler = AsyncIOScheduler()
     sm = app.state.scheduler_manager
     scheduler.add_job(
         scheduled_cleanup,
@@ -97,9 +99,10 @@ async def lifespan(app: FastAPI):
     )
     scheduler.start()
     app.state.scheduler = scheduler
-    logger.info(
-        f"Scheduler started. Cleanup runs daily at {sm.state.cron_hour:02d}:{sm.state.cron_minute:02d} UTC."
-    )
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Scheduler started. Cleanup runs daily at %02d:%02d UTC.", sm.state.cron_hour, sm.state.cron_minute
+        )
 
     yield
 
@@ -195,7 +198,7 @@ def auth_callback(request: Request):
 @app.get("/scheduler/status")
 def scheduler_status():
     sm: SchedulerManager = app.state.scheduler_manager
-    scheduler: BackgroundScheduler = app.state.scheduler
+    scheduler: AsyncIOScheduler = app.state.scheduler
 
     job = scheduler.get_job("cleanup")
     next_run = job.next_run_time.isoformat() if job and job.next_run_time else None
@@ -210,9 +213,9 @@ def scheduler_run_now():
     if app.state.gmail_client is None:
         raise HTTPException(status_code=401, detail="Not authenticated. Use /auth/initiate first.")
 
-    def _run():
+    async def _run():
         job = CleanupJob()
-        job.run(app.state.gmail_client, app.state.scheduler_manager)
+        await asyncio.to_thread(job.run, app.state.gmail_client, app.state.scheduler_manager)
 
     app.state.scheduler.add_job(_run, id="cleanup_manual", replace_existing=True)
     return {
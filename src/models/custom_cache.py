@@ -1,4 +1,3 @@
-from collections import defaultdict
 from src.models.message import Message
 import logging
 
@@ -7,27 +6,23 @@ logger = logging.getLogger(__name__)
 
 
 class CustomCache:
-    def __init__(self):
-        self.cache = defaultdict(list)
-        self.cache["promotions"] = []
-        self.cache["social"] = []
+    _VALID = frozenset({"promotions", "social", "primary"})
 
-    def insert(self, category, messages):
-        if category == "promotions":
-            self.cache["promotions"].extend(messages)
-
-        elif category == "social":
-            self.cache["social"].extend(messages)
+    def __init__(self, keep_messages: bool = True):
+        self.keep_messages = keep_messages
+        self.cache: dict[str, list] = {category: [] for category in ("promotions", "social", "primary")}
+        self.counts = {category: 0 for category in self.cache}
 
-        else:
+    def insert(self, category, messages):
+        if category not in self._VALID:
             logger.error(f"User entered the incorrect category type: {category}")
             raise ValueError(f"Invalid category: {category}")
+        self.counts[category] += len(messages)
+        if self.keep_messages:
+            self.cache[category].extend(messages)
 
     def get(self, category):
         return self.cache[category]
 
     def get_cache_data(self):
-        return {
-            "promotions": len(self.cache["promotions"]),
-            "social": len(self.cache["social"]),
-        }
+        return dict(self.counts)
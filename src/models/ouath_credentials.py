@@ -1,10 +1,27 @@
-from pydantic import BaseModel
+from functools import cached_property
+import orjson
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
-import json
 from google.oauth2.credentials import Credentials
 
 
+def _redact(value: str) -> str:
+    if not value:
+        return ""
+    if len(value) <= 8:
+        return "***"
+    return f"{value[:4]}…{value[-4:]}"
+
+
+# Computed once per instance and stored in __dict__ by cached_property
+_CACHED_ATTRS = ("_authorized_user_info", "_google_credentials")
+
+
 class OAuthCredentials(BaseModel):
+    # Frozen so fields can't change under the cached dict/Credentials below;
+    # model_copy drops the caches since it copies __dict__ along with the fields
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     token: str
     refresh_token: str
     token_uri: str
@@ -12,25 +29,27 @@ class OAuthCredentials(BaseModel):
     client_secret: str
     scopes: List[str]
 
-    def __repr__(self):
-        def _redact(value: str) -> str:
-            if not value:
-                return ""
-            if len(value) <= 8:
-                return "***"
-            return f"{value[:4]}…{value[-4:]}"
-
-        return (
-            "Credentials("
-            f"token='{_redact(self.token)}', "
-            f"refresh_token='{_redact(self.refresh_token)}', "
-            f"token_uri='{self.token_uri}', "
-            f"client_id='{_redact(self.client_id)}', "
-            f"scopes={self.scopes}"
-            ")"
-        )
+    def __repr_name__(self) -> str:
+        return "Credentials"
 
-    def to_dict(self):
+    def __repr_args__(self):
+        # Let pydantic build the repr, but never with the raw secrets
+        return [
+            ("token", _redact(self.token)),
+            ("refresh_token", _redact(self.refresh_token)),
+            ("token_uri", self.token_uri),
+            ("client_id", _redact(self.client_id)),
+            ("scopes", self.scopes),
+        ]
+
+    def model_copy(self, *, update=None, deep: bool = False):
+        copied = super().model_copy(update=update, deep=deep)
+        for name in _CACHED_ATTRS:
+            copied.__dict__.pop(name, None)
+        return copied
+
+    @cached_property
+    def _authorized_user_info(self):
         return {
             'token': self.token,
             'refresh_token': self.refresh_token,
@@ -40,8 +59,16 @@ class OAuthCredentials(BaseModel):
             'scopes': self.scopes
         }
 
+    @cached_property
+    def _google_credentials(self):
+        return Credentials.from_authorized_user_info(self._authorized_user_info, self.scopes)
+
+    def to_dict(self):
+        # A copy, so callers can't mutate the cache behind to_json()
+        return dict(self._authorized_user_info)
+
     def to_json(self):
-        return json.dumps(self.to_dict())
+        return orjson.dumps(self._authorized_user_info).decode()
 
     def to_google_credentials(self):
-        return Credentials.from_authorized_user_info(self.to_dict(), self.scopes)
+        return self._google_credentials
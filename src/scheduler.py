@@ -1,10 +1,15 @@
-import json
 import logging
-from datetime import datetime, timezone
-from typing import List, Optional
-from pydantic import BaseModel
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+import orjson
 from src.config import (
     SCHEDULER_STATE_FILE,
+    SCHEDULER_RUNS_FILE,
     CLEANUP_CATEGORIES,
     CLEANUP_LOOKBACK_DAYS,
     CLEANUP_CRON_HOUR,
@@ -13,53 +18,183 @@ from src.config import (
 
 logger = logging.getLogger(__name__)
 
+RUN_HISTORY_LIMIT = 10
 
-class CategoryResult(BaseModel):
+
+@dataclass(slots=True)
+class CategoryResult:
     category: str
     fetched: int
     deleted: int
     error: Optional[str] = None
 
+    @classmethod
+    def batch(
+        cls,
+        categories: List[str],
+        fetched: List[int],
+        deleted: List[int],
+        errors: List[Optional[str]],
+    ) -> List["CategoryResult"]:
+        """Build results from the per-column lists the job filled in"""
+        return [cls(c, f, d, e) for c, f, d, e in zip(categories, fetched, deleted, errors)]
+
 
-class RunRecord(BaseModel):
+@dataclass(slots=True)
+class RunRecord:
     timestamp: str
     success: bool
     categories: List[CategoryResult]
     total_deleted: int
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "RunRecord":
+        return cls(
+            timestamp=data["timestamp"],
+            success=data["success"],
+            categories=[CategoryResult(**c) for c in data["categories"]],
+            total_deleted=data["total_deleted"],
+        )
+
+    def to_dict(self, exclude_none: bool = False) -> dict:
+        data = asdict(self)
+        if exclude_none:
+            data["categories"] = [
+                {key: value for key, value in c.items() if value is not None} for c in data["categories"]
+            ]
+        return data
+
 
-class SchedulerState(BaseModel):
-    categories: List[str] = CLEANUP_CATEGORIES
+# Frozen: SchedulerManager swaps in updated copies rather than mutating fields
+@dataclass(slots=True, frozen=True)
+class SchedulerState:
+    categories: List[str] = field(default_factory=lambda: list(CLEANUP_CATEGORIES))
     lookback_days: int = CLEANUP_LOOKBACK_DAYS
     cron_hour: int = CLEANUP_CRON_HOUR
     cron_minute: int = CLEANUP_CRON_MINUTE
+    # Only the latest run is kept in memory; the run log holds the history
     last_run: Optional[RunRecord] = None
-    run_history: List[RunRecord] = []
+
+    def config_dict(self) -> dict:
+        """The persisted config; runs live in the run log"""
+        return {
+            "categories": self.categories,
+            "lookback_days": self.lookback_days,
+            "cron_hour": self.cron_hour,
+            "cron_minute": self.cron_minute,
+        }
 
 
 class SchedulerManager:
-    def __init__(self, state_file: str = SCHEDULER_STATE_FILE):
+    RUNS_COMPACT_LINES = 100 * RUN_HISTORY_LIMIT  # Rewrite the run log once it grows past this
+
+    def __init__(self, state_file: str = SCHEDULER_STATE_FILE, runs_file: str = SCHEDULER_RUNS_FILE):
         self.state_file = state_file
+        self.runs_file = runs_file
         self.state = self._load()
+        self._state_lock = threading.Lock()
+        self._status_cache: Optional[Tuple[SchedulerState, dict]] = None
+        self._save_lock = threading.Lock()
 
     def _load(self) -> SchedulerState:
         try:
-            with open(self.state_file, "r") as f:
-                data = json.load(f)
-            return SchedulerState(**data)
+            with open(self.state_file, "rb") as f:
+                data = orjson.loads(f.read())
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
         except FileNotFoundError:
-            return SchedulerState()
+            data = {}
         except Exception as e:
             logger.error(f"Failed to load scheduler state: {e}")
-            return SchedulerState()
+            data = {}
+
+        # The run log is read separately, so a bad run never costs the config
+        defaults = SchedulerState()
+        return SchedulerState(
+            categories=data.get("categories", defaults.categories),
+            lookback_days=data.get("lookback_days", defaults.lookback_days),
+            cron_hour=data.get("cron_hour", defaults.cron_hour),
+            cron_minute=data.get("cron_minute", defaults.cron_minute),
+            # State files from before the run log kept the history inline
+            last_run=self._load_last_run(legacy_runs=data.get("run_history")),
+        )
+
+    def _load_last_run(self, legacy_runs: Optional[List[dict]] = None) -> Optional[RunRecord]:
+        """The newest well-formed run in the run log, if any"""
+        try:
+            runs = self._load_runs(legacy_runs)
+        except Exception as e:
+            logger.error(f"Failed to load scheduler run log: {e}")
+            return None
+        for data in reversed(runs):
+            try:
+                return RunRecord.from_dict(data)
+            except (KeyError, TypeError) as e:
+                logger.warning(f"Skipping malformed run in {self.runs_file}: {e}")
+        return None
+
+    def _load_runs(self, legacy_runs: Optional[List[dict]] = None) -> List[dict]:
+        """Read the last RUN_HISTORY_LIMIT runs from the run log"""
+        try:
+            with open(self.runs_file, "rb") as f:
+                line_count = 0
+                lines = deque(maxlen=RUN_HISTORY_LIMIT)
+                for line in f:
+                    line_count += 1
+                    lines.append(line)
+        except FileNotFoundError:
+            if legacy_runs:
+                self._write_file(self.runs_file, self._encode_runs(legacy_runs))
+            return legacy_runs or []
+
+        runs = []
+        rewrite = line_count > self.RUNS_COMPACT_LINES
+        for line in lines:
+            try:
+                runs.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                # A crash mid-append can leave a torn last line; rewrite so the next append starts clean
+                logger.warning(f"Skipping unreadable line in {self.runs_file}")
+                rewrite = True
+        if rewrite:
+            self._write_file(self.runs_file, self._encode_runs(runs))
+        return runs
+
+    @staticmethod
+    def _encode_runs(runs: List[dict]) -> bytes:
+        return b"".join(orjson.dumps(run) + b"\n" for run in runs)
+
+    @staticmethod
+    def _write_file(path: str, payload: bytes):
+        # Write a temp file and rename it over the target, so it is never left half-written
+        tmp_file = path + ".tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(payload)
+            # Make the bytes durable before the rename, or a crash can leave an empty file
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
 
     def _save(self):
         try:
-            with open(self.state_file, "w") as f:
-                json.dump(self.state.model_dump(), f, indent=2)
+            # Runs live in the append-only run log, so only the (rarely edited) config is rewritten here
+            payload = orjson.dumps(self.state.config_dict(), option=orjson.OPT_INDENT_2)
+            with self._save_lock:
+                self._write_file(self.state_file, payload)
         except Exception as e:
             logger.error(f"Failed to save scheduler state: {e}")
 
+    def _append_run(self, run: RunRecord):
+        try:
+            with self._save_lock:
+                with open(self.runs_file, "ab") as f:
+                    # Most category errors are None; the field default restores them on load
+                    f.write(orjson.dumps(run.to_dict(exclude_none=True)) + b"\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+        except Exception as e:
+            logger.error(f"Failed to append to scheduler run log: {e}")
+
     def update_config(
         self,
         categories: Optional[List[str]] = None,
@@ -67,86 +202,104 @@ class SchedulerManager:
         cron_hour: Optional[int] = None,
         cron_minute: Optional[int] = None,
     ):
-        if categories is not None:
-            self.state.categories = categories
-        if lookback_days is not None:
-            self.state.lookback_days = lookback_days
-        if cron_hour is not None:
-            self.state.cron_hour = cron_hour
-        if cron_minute is not None:
-            self.state.cron_minute = cron_minute
+        update = {
+            "categories": categories,
+            "lookback_days": lookback_days,
+            "cron_hour": cron_hour,
+            "cron_minute": cron_minute,
+        }
+        with self._state_lock:
+            self.state = replace(self.state, **{key: value for key, value in update.items() if value is not None})
         self._save()
 
     def record_run(self, run: RunRecord):
-        self.state.last_run = run
-        self.state.run_history.append(run)
-        # Keep only the last 10 runs
-        if len(self.state.run_history) > 10:
-            self.state.run_history = self.state.run_history[-10:]
-        self._save()
+        with self._state_lock:
+            self.state = replace(self.state, last_run=run)
+        self._append_run(run)
 
     def get_status(self) -> dict:
-        return {
-            "last_run": self.state.last_run.model_dump() if self.state.last_run else None,
-            "config": {
-                "categories": self.state.categories,
-                "lookback_days": self.state.lookback_days,
-                "cron_hour": self.state.cron_hour,
-                "cron_minute": self.state.cron_minute,
-            },
-        }
+        # State is frozen and replaced on every change, so a cache keyed on it can't go stale
+        state = self.state
+        cached = self._status_cache
+        if cached is None or cached[0] is not state:
+            status = {
+                "last_run": state.last_run.to_dict() if state.last_run else None,
+                "config": state.config_dict(),
+            }
+            cached = self._status_cache = (state, status)
+        # Callers add top-level keys (e.g. next_run); hand out a copy
+        return dict(cached[1])
 
 
 class CleanupJob:
-    def run(self, gmail_client, scheduler_manager: SchedulerManager):
-        import datetime as dt
+    MAX_WORKERS = 8  # Upper bound on categories processed concurrently
+
+    @staticmethod
+    def _fetch_category(
+        gmail_client, category: str, start_date: str, end_date: str
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Fetch one category. Returns (emails, error)."""
+        try:
+            emails = gmail_client.fetch_user_emails(
+                start_date=start_date,
+                end_date=end_date,
+                category=category,
+            )
+            return emails, None
+
+        except Exception as e:
+            logger.error(f"Error processing category {category}: {e}")
+            return [], str(e)
 
+    def run(self, gmail_client, scheduler_manager: SchedulerManager):
         state = scheduler_manager.state
         now = datetime.now(timezone.utc)
-        end_date = now.strftime("%Y-%m-%d")
-        start_date = (now - dt.timedelta(days=state.lookback_days)).strftime("%Y-%m-%d")
+        end_date = now.date().isoformat()
+        start_date = (now - timedelta(days=state.lookback_days)).date().isoformat()
+        categories = list(state.categories)
 
-        category_results: List[CategoryResult] = []
-        total_deleted = 0
-        overall_success = True
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Starting cleanup job for categories: %s", categories)
 
-        logger.info(f"Starting cleanup job for categories: {state.categories}")
+        # Categories are independent network-bound work; map() keeps results in category order
+        with ThreadPoolExecutor(max_workers=max(1, min(self.MAX_WORKERS, len(categories)))) as executor:
+            results = list(executor.map(
+                lambda category: self._fetch_category(gmail_client, category, start_date, end_date),
+                categories,
+            ))
 
-        for category in state.categories:
-            try:
-                emails = gmail_client.fetch_user_emails(
-                    start_date=start_date,
-                    end_date=end_date,
-                    category=category,
-                )
-                fetched = len(emails)
-
-                if not emails:
-                    category_results.append(
-                        CategoryResult(category=category, fetched=0, deleted=0)
-                    )
-                    continue
-
-                cache = {category: emails}
-                deleted = gmail_client.delete_user_emails(cache, category)
-                total_deleted += deleted
-
-                category_results.append(
-                    CategoryResult(category=category, fetched=fetched, deleted=deleted)
-                )
-                logger.info(f"Category {category}: fetched={fetched}, deleted={deleted}")
+        emails_by_category = [emails for emails, _ in results]
+        errors = [error for _, error in results]
+        fetched_counts = [len(emails) for emails in emails_by_category]
 
+        # Delete every category's messages in one pass so batches are shared across categories
+        all_emails = [email for emails in emails_by_category for email in emails]
+        # Filled as batches succeed, so a later failure keeps the counts of earlier ones
+        deleted_ids: List[str] = []
+        delete_error = None
+        if all_emails:
+            try:
+                gmail_client.batch_delete(all_emails, deleted_ids=deleted_ids)
             except Exception as e:
-                logger.error(f"Error processing category {category}: {e}")
-                overall_success = False
-                category_results.append(
-                    CategoryResult(category=category, fetched=0, deleted=0, error=str(e))
-                )
+                logger.error(f"Error deleting emails: {e}")
+                delete_error = str(e)
+
+        deleted_set = set(deleted_ids)
+        deleted_counts = [sum(email["id"] in deleted_set for email in emails) for emails in emails_by_category]
+        if delete_error is not None:
+            # Only categories left with undeleted mail were hit by the failure
+            errors = [error or (delete_error if deleted < fetched else None)
+                      for error, fetched, deleted in zip(errors, fetched_counts, deleted_counts)]
+        if logger.isEnabledFor(logging.INFO):
+            for category, fetched, deleted in zip(categories, fetched_counts, deleted_counts):
+                if fetched:
+                    logger.info("Category %s: fetched=%d, deleted=%d", category, fetched, deleted)
+        total_deleted = sum(deleted_counts)
 
         run = RunRecord(
             timestamp=now.isoformat(),
-            success=overall_success,
-            categories=category_results,
+            success=all(error is None for error in errors),
+            categories=CategoryResult.batch(categories, fetched_counts, deleted_counts, errors),
             total_deleted=total_deleted,
         )
         scheduler_manager.record_run(run)